@@ -1,13 +1,14 @@
 import logging
 
-from flask import Flask, jsonify, request
+from flask import Flask, g, jsonify, request
 from flask_cors import CORS
 
 from sample_data import book_data
 from environment import Environment
 from keycloak_url_gen import KeycloakURLGenerator
 from keycloak_validator import KeycloakValidator
-from models import db, Book, User, Wishlist
+from models import db, Book, User, Wishlist, REPLICA_BIND_PREFIX
+from profiler import RequestProfiler
 from functools import wraps
 
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -22,12 +23,15 @@ kc_url = KeycloakURLGenerator(base_url=env.KEYCLOAK_HOST, realm_name=env.REALM)
 validator = KeycloakValidator(kc_url, env.CLIENT_ID)
 
 app.config.update({
-    'SQLALCHEMY_DATABASE_URI': 'sqlite:///books.db',
+    'SQLALCHEMY_DATABASE_URI': env.DATABASE_URI if env.DATABASE_URI else 'sqlite:///books.db',
+    'SQLALCHEMY_BINDS': {f'{REPLICA_BIND_PREFIX}{i}': uri for i, uri in enumerate(env.READ_REPLICA_URIS)},
     'SQLALCHEMY_TRACK_MODIFICATIONS': False,
     'SECRET_KEY': env.SECRET_KEY if env.SECRET_KEY else 'ThisIsNotASecureKeyForProduction!',
 })
 db.init_app(app)
-CORS(app)  # Enable CORS for all routes
+CORS(app, expose_headers=['X-Profile-Id', 'X-Profile-Summary'])  # Enable CORS for all routes
+
+profiler = RequestProfiler()
 
 
 def jwt_required(func):
@@ -54,6 +58,53 @@ def jwt_required(func):
     return wrapper
 
 
+def read_replica(func):
+    """Lets the queries of a read-only route be served by a read replica.
+
+    Has no effect when no READ_REPLICA_URIS are configured. Once the request
+    writes anything, the session falls back to the primary database.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        g.use_read_replica = True
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+@app.before_request
+def start_profiling():
+    """Starts profiling the request if an admin token sends the 'X-Profile: 1' header."""
+    if request.headers.get('X-Profile') != '1':
+        return
+
+    auth_header = request.headers.get('Authorization')
+    if not auth_header or not auth_header.startswith('Bearer '):
+        return
+
+    token = validator.validate_token(auth_header.split("Bearer ")[-1])
+    if token and 'admin' in token.roles:
+        profiler.start()
+
+
+@app.after_request
+def stop_profiling(response):
+    """Stores the profile of the request and adds its id and a summary to the response headers."""
+    if profiler.is_running():
+        profile = profiler.save(request.method, request.path, response.status_code)
+        response.headers['X-Profile-Id'] = profile['id']
+        response.headers['X-Profile-Summary'] = (f"duration_ms={profile['duration_ms']}; "
+                                                 f"queries={len(profile['queries'])}; "
+                                                 f"sql_time_ms={profile['sql_time_ms']}")
+    return response
+
+
+@app.teardown_request
+def cleanup_profiling(exception):
+    """Stops the profiler if the request ended before stop_profiling could run."""
+    profiler.stop()
+
+
 @app.route('/api/signup', methods=['POST'])
 @jwt_required
 def create_account(token):
@@ -118,6 +169,7 @@ def update_profile_picture(token):
 
 
 @app.route('/api/books', methods=['GET'])
+@read_replica
 def get_books():
     """Retrieves a list of all available books.
 
@@ -131,6 +183,7 @@ def get_books():
 
 
 @app.route('/api/books/<int:book_id>', methods=['GET'])
+@read_replica
 def get_book(book_id):
     """Retrieves a book by its ID.
 
@@ -232,11 +285,32 @@ def delete_book_by_id(token, book_id):
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/admin/profiles', methods=['GET'])
+@jwt_required
+def get_profiles(token):
+    """Retrieves the latest request profiles, newest first, only if user is admin.
+
+    Each profile contains the cProfile summary of the request, the SQL statements
+    run with their timing and, on SQLite, the query plan of each SELECT.
+
+    Returns:
+        JSON: {'profiles': [<profile>, ...]} on success, error message otherwise.
+        Status code: 200 for success, 403 if user is not admin.
+    """
+    if 'admin' not in token.roles:
+        return jsonify({"error": "User is not admin"}), 403
+
+    return jsonify({'profiles': list(reversed(profiler.profiles))}), 200
+
+
 @app.route('/api/wishlist', methods=['GET'])
 @jwt_required
 def get_wishlist(token):
     """Retrieves the user's wishlist associated with the JWT token.
 
+    Always served by the primary database, so that changes made with
+    POST/DELETE /api/wishlist are visible straight away.
+
     Returns:
         JSON: List of book data in user's wishlist if found,
                empty list if wishlist is empty,
@@ -11,6 +11,8 @@ class Environment:
       KEYCLOAK_URI_SCHEME: The value of the 'KEYCLOAK_URI_SCHEME' environment variable.
       KEYCLOAK_HOST: The value of the 'KEYCLOAK_HOST' environment variable.
       REALM: The value of the 'KEYCLOAK_REALM' environment variable.
+      DATABASE_URI: The value of the 'DATABASE_URI' environment variable (primary database, optional).
+      READ_REPLICA_URIS: List of URIs from the comma-separated 'READ_REPLICA_URIS' environment variable (optional).
     """
 
     def __init__(self):
@@ -25,6 +27,8 @@ class Environment:
         self.KEYCLOAK_HOST = os.getenv('KEYCLOAK_HOST')
         self.REALM = os.getenv('KEYCLOAK_REALM')
         self.SECRET_KEY = os.getenv('SECRET_KEY')
+        self.DATABASE_URI = os.getenv('DATABASE_URI')
+        self.READ_REPLICA_URIS = [uri.strip() for uri in os.getenv('READ_REPLICA_URIS', '').split(',') if uri.strip()]
 
         # Check for required variables
         required_vars = ['CLIENT_ID', 'KEYCLOAK_URI_SCHEME', 'KEYCLOAK_HOST', 'REALM']
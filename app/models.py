@@ -1,6 +1,62 @@
+import random
+
+from flask import g, has_request_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+
+REPLICA_BIND_PREFIX = 'replica_'
+
+
+class RoutingSession(Session):
+    """Session that sends reads to a read-only replica engine when allowed.
+
+    Reads are routed to one of the engines configured under a bind key starting
+    with ``REPLICA_BIND_PREFIX`` only while the current request has been marked
+    with ``read_replica``. The replica is picked once and reused for the whole
+    session, which Flask-SQLAlchemy scopes to the request, so a response never
+    mixes data from replicas that lag by different amounts. As soon as the
+    session holds pending changes or has flushed once, it sticks to the primary
+    for the rest of its lifetime, so a request always reads its own writes.
+    """
+
+    def __init__(self, db, **kwargs):
+        super().__init__(db, **kwargs)
+        self._primary_only = False
+        self._replica = None
+
+    def _replica_engines(self):
+        """Returns the engines configured as read replicas.
+
+        Returns:
+            list: Replica engines, empty if none are configured.
+        """
+        return [engine for key, engine in self._db.engines.items()
+                if key is not None and key.startswith(REPLICA_BIND_PREFIX)]
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        """Picks the engine for a statement, preferring a replica for request reads.
+
+        Returns:
+            Engine: A replica engine for reads in a replica-enabled request,
+                the engine chosen by Flask-SQLAlchemy otherwise.
+        """
+        if bind is None and not self._primary_only:
+            if self._flushing or self.new or self.dirty or self.deleted:
+                self._primary_only = True
+            elif has_request_context() and g.get('use_read_replica'):
+                if self._replica is None:
+                    replicas = self._replica_engines()
+                    if replicas:
+                        self._replica = random.choice(replicas)
+                    else:
+                        self._primary_only = True
+                if self._replica is not None:
+                    return self._replica
+
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 
 class User(db.Model):
@@ -0,0 +1,172 @@
+import cProfile
+import io
+import logging
+import pstats
+import threading
+import time
+import uuid
+from collections import deque
+
+from flask import g, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class RequestProfiler:
+    """
+    This class captures opt-in, per-request profiles.
+
+    A profile holds a cProfile summary of the request, every SQL statement run
+    with its timing and, on SQLite, the query plan of each SELECT. Finished
+    profiles are kept in a ring buffer. SQL listeners return straight away while
+    no request is being profiled, so the cost when disabled is a single
+    attribute check.
+
+    Args:
+        max_profiles (int, optional): Number of profiles kept in the buffer (default: 50).
+        max_stats_lines (int, optional): Number of functions listed in the cProfile summary (default: 25).
+    """
+
+    def __init__(self, max_profiles=50, max_stats_lines=25):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.profiles = deque(maxlen=max_profiles)
+        self.max_stats_lines = max_stats_lines
+        self._active = 0
+        self._cprofile_busy = False
+        self._lock = threading.Lock()
+        event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    def start(self):
+        """Starts profiling the current request.
+
+        Only one cProfile capture can run at a time (Python 3.12+ allows a single
+        active profiler per process). If one is already running, the request is
+        profiled without the cProfile summary and SQL is still captured.
+        """
+        with self._lock:
+            use_cprofile = not self._cprofile_busy
+            self._cprofile_busy = True
+
+        profiler = None
+        if use_cprofile:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError as e:
+                self.logger.debug(f"Can't start cProfile - {e}")
+                profiler = None
+                with self._lock:
+                    self._cprofile_busy = False
+
+        with self._lock:
+            self._active += 1
+        g.profiler = profiler
+        g.profile_queries = []
+        g.profile_started = time.perf_counter()
+
+    def is_running(self) -> bool:
+        """Tells whether the current request is being profiled.
+
+        Returns:
+            bool: True if start() was called for the current request and save() was not.
+        """
+        return 'profile_queries' in g
+
+    def stop(self):
+        """Stops the cProfile capture and the SQL capture of the current request.
+
+        Safe to call more than once and when the request is not profiled, so it
+        can be used to clean up when a request ends with an exception.
+        """
+        if 'profile_started' not in g:
+            return
+
+        g.profile_duration_ms = (time.perf_counter() - g.pop('profile_started')) * 1000
+        profiler = g.get('profiler')
+        if profiler is not None:
+            profiler.disable()
+            with self._lock:
+                self._cprofile_busy = False
+        with self._lock:
+            self._active -= 1
+
+    def save(self, method, path, status_code) -> dict:
+        """Stops profiling the current request and stores the result in the buffer.
+
+        Args:
+            method (str): HTTP method of the request.
+            path (str): Path of the request.
+            status_code (int): Status code of the response.
+
+        Returns:
+            dict: The stored profile. Its 'cprofile' entry is None if another
+                request was using cProfile at the time.
+        """
+        self.stop()
+        profiler = g.pop('profiler')
+        queries = g.pop('profile_queries')
+        duration_ms = g.pop('profile_duration_ms')
+
+        cprofile_summary = None
+        if profiler is not None:
+            stats_stream = io.StringIO()
+            stats = pstats.Stats(profiler, stream=stats_stream)
+            stats.strip_dirs().sort_stats('cumulative').print_stats(self.max_stats_lines)
+            cprofile_summary = stats_stream.getvalue()
+
+        profile = {
+            'id': uuid.uuid4().hex,
+            'timestamp': time.time(),
+            'method': method,
+            'path': path,
+            'status_code': status_code,
+            'duration_ms': round(duration_ms, 3),
+            'sql_time_ms': round(sum(query['duration_ms'] for query in queries), 3),
+            'queries': queries,
+            'cprofile': cprofile_summary,
+        }
+        self.profiles.append(profile)
+        self.logger.debug(f"Profiled {method} {path} in {profile['duration_ms']} ms, {len(queries)} queries")
+        return profile
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if not self._active or not has_request_context() or 'profile_started' not in g:
+            return
+        conn.info.setdefault('profile_query_start', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if not self._active or not has_request_context() or 'profile_started' not in g:
+            return
+        started = conn.info['profile_query_start'].pop()
+        duration_ms = (time.perf_counter() - started) * 1000
+        g.profile_queries.append({
+            'statement': statement,
+            'parameters': repr(parameters),
+            'duration_ms': round(duration_ms, 3),
+            'plan': self._explain(conn, statement, parameters, executemany),
+        })
+
+    def _explain(self, conn, statement, parameters, executemany):
+        """Retrieves the SQLite query plan of a SELECT statement.
+
+        The plan is read with EXPLAIN QUERY PLAN through a separate DBAPI cursor,
+        so it is neither timed nor captured as a query itself. Other databases
+        are skipped: a failing EXPLAIN there could abort the request's transaction.
+
+        Returns:
+            list | None: Rows of the plan as strings, None for other statements,
+                other databases or if the plan can't be retrieved.
+        """
+        if conn.dialect.name != 'sqlite' or executemany or not statement.lstrip().upper().startswith('SELECT'):
+            return None
+
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.execute('EXPLAIN QUERY PLAN ' + statement, parameters)
+            return [' '.join(str(column) for column in row) for row in cursor.fetchall()]
+        except Exception as e:
+            self.logger.debug(f"Can't explain statement - {e}")
+            return None
+        finally:
+            cursor.close()
@@ -0,0 +1,124 @@
+"""Checks read replica routing against two local SQLite files.
+
+Creates a temporary primary database with the sample data and a copy used as
+replica, then removes one book from the replica only so the two can be told
+apart. The Keycloak token check is replaced by a fixed admin token.
+
+Usage:
+    python3 app/replica_check.py                         # routing check
+    python3 app/replica_check.py --bench                 # throughput, reads on the replica
+    python3 app/replica_check.py --bench --primary-only  # throughput, no replica configured
+"""
+import argparse
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+REPLICA_ONLY_MISSING = '1984'
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument('--bench', action='store_true', help='measure GET /api/books throughput over HTTP')
+parser.add_argument('--primary-only', action='store_true', help='do not configure the replica')
+parser.add_argument('--requests', type=int, default=5000, help='number of requests for --bench (default: 5000)')
+parser.add_argument('--concurrency', type=int, default=20, help='concurrent clients for --bench (default: 20)')
+args = parser.parse_args()
+
+tmp_dir = tempfile.mkdtemp(prefix='bookshop-replica-')
+primary_path = os.path.join(tmp_dir, 'books.db')
+replica_path = os.path.join(tmp_dir, 'books-replica.db')
+
+# Must be set before the app is imported, the app reads them at import time
+os.environ['DATABASE_URI'] = f'sqlite:///{primary_path}'
+os.environ['READ_REPLICA_URIS'] = '' if args.primary_only else f'sqlite:///{replica_path}'
+for var, value in [('CLIENT_ID', 'bookshop'), ('KEYCLOAK_URI_SCHEME', 'http'),
+                   ('KEYCLOAK_HOST', 'localhost:8080'), ('KEYCLOAK_REALM', 'unimi')]:
+    os.environ.setdefault(var, value)
+
+import app as bookshop  # noqa: E402
+from models import db, Book  # noqa: E402
+from sample_data import book_data  # noqa: E402
+from token_info import TokenInfo  # noqa: E402
+
+logging.getLogger().setLevel(logging.WARNING)
+
+admin_token = TokenInfo({
+    'given_name': 'Admin',
+    'family_name': 'Check',
+    'email': 'admin@example.com',
+    'resource_access': {bookshop.env.CLIENT_ID: {'roles': ['admin']}},
+})
+bookshop.validator.validate_token = lambda token: admin_token
+
+
+def create_databases():
+    """Creates the primary database with the sample data and the modified replica copy."""
+    with bookshop.app.app_context():
+        db.create_all()
+        for title, author, price, cover_image_url in book_data:
+            db.session.add(Book(title=title, author=author, price=price, cover_image_url=cover_image_url))
+        db.session.commit()
+        db.engine.dispose()
+
+    shutil.copy(primary_path, replica_path)
+    with sqlite3.connect(replica_path) as replica:
+        replica.execute('DELETE FROM book WHERE title = ?', (REPLICA_ONLY_MISSING,))
+
+
+def check_routing():
+    """Asserts that catalogue reads use the replica and writes use the primary."""
+    client = bookshop.app.test_client()
+
+    titles = [book['title'] for book in client.get('/api/books').get_json()]
+    assert REPLICA_ONLY_MISSING not in titles, 'GET /api/books was not served by the replica'
+    print(f"GET /api/books: {len(titles)} books, '{REPLICA_ONLY_MISSING}' missing -> replica")
+
+    author = next(author for title, author, _, _ in book_data if title == REPLICA_ONLY_MISSING)
+    response = client.post('/api/admin/book', headers={'Authorization': 'Bearer check'},
+                           json={'title': REPLICA_ONLY_MISSING, 'author': author})
+    assert response.status_code == 409, f'duplicate check returned {response.status_code}, expected 409'
+    print(f"POST /api/admin/book '{REPLICA_ONLY_MISSING}': 409 -> duplicate check on the primary")
+
+
+def bench():
+    """Serves the app over HTTP and measures GET /api/books requests per second."""
+    import requests
+    from werkzeug.serving import make_server
+
+    server = make_server('127.0.0.1', 0, bookshop.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_port}/api/books'
+    local = threading.local()
+
+    def fetch(_):
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        local.session.get(url).raise_for_status()
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(fetch, range(args.concurrency)))  # warm up connections
+        started = time.perf_counter()
+        list(pool.map(fetch, range(args.requests)))
+        elapsed = time.perf_counter() - started
+    server.shutdown()
+
+    mode = 'primary only' if args.primary_only else 'replica'
+    print(f'{mode}: {args.requests} requests, concurrency {args.concurrency}, '
+          f'{args.requests / elapsed:.1f} requests/s')
+
+
+if __name__ == '__main__':
+    try:
+        create_databases()
+        if args.bench:
+            bench()
+        elif args.primary_only:
+            parser.error('--primary-only is only meaningful with --bench')
+        else:
+            check_routing()
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)